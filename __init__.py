@@ -1,4 +1,5 @@
 import logging
+from contextlib import nullcontext
 from datetime import timedelta
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
@@ -10,11 +11,13 @@ from homeassistant.const import (
 )
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .api import PufferPanelClient
-from .const import DOMAIN
+from .api import PufferPanelClient, ServerFilter
+from .const import DOMAIN, TRACE_CYCLES
+from .tracing import RefreshTracer
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -36,6 +39,15 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     )
     host = entry.data[CONF_HOST]
 
+    server_filter = ServerFilter(
+        include=entry.options.get("include_servers", entry.data.get("include_servers")),
+        exclude=entry.options.get("exclude_servers", entry.data.get("exclude_servers")),
+    )
+
+    tracer = None
+    if entry.options.get("enable_tracing", False):
+        tracer = RefreshTracer(max_cycles=TRACE_CYCLES)
+
     session = async_get_clientsession(hass)
     client = PufferPanelClient(
         host=host,
@@ -43,45 +55,110 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         client_id=client_id,
         client_secret=client_secret,
         session=session,
-        use_https=use_https
+        use_https=use_https,
+        tracer=tracer
     )
 
+    def trace_span(name, **args):
+        if tracer is None:
+            return nullcontext({})
+        return tracer.span(name, cat="server", **args)
+
     async def async_update_data():
         """Fetch data from PufferPanel for all servers."""
+        if tracer is None:
+            return await async_fetch_servers()
+        with tracer.cycle() as span:
+            try:
+                results = await async_fetch_servers()
+            except UpdateFailed:
+                span["outcome"] = "failed"
+                raise
+            span["servers"] = len(results)
+            return results
+
+    async def async_fetch_servers():
+        """Poll every monitored server once."""
         try:
             response = await client.get_servers()
-            if response is None:
-                raise UpdateFailed("Failed to fetch servers from PufferPanel")
+            if not response:
+                raise UpdateFailed(f"Failed to fetch servers from PufferPanel: {response}")
 
-            server_list = response.get("servers", [])
+            server_list = [s for s in response.data.get("servers", []) if server_filter.allows(s)]
             all_server_results = {}
 
             for server in server_list:
                 sid = server["id"]
-                status = await client.get_server_status(sid)
-                flags = await client.get_server_flags(sid)
-                is_running = status.get("running", False)
+                node_info = server.get("node")
+                node = node_info.get("name") if isinstance(node_info, dict) else None
+                if tracer is not None:
+                    tracer.server_nodes[sid] = node
+                with trace_span(f"server {server.get('name', sid)}", server_id=sid, node=node) as server_span:
+                    previous = (coordinator.data or {}).get(sid) or {}
+                    status_result = await client.get_server_status(sid)
+                    flags_result = await client.get_server_flags(sid)
+
+                    # A failed status or flags call must not be reported as
+                    # "Offline"/"Unknown": keep the last known values, or mark
+                    # the server's entities unavailable if there are none yet
+                    if not status_result or not flags_result:
+                        failed = status_result if not status_result else flags_result
+                        server_span["outcome"] = f"stale: {failed.error}" if previous else f"unavailable: {failed.error}"
+                        if previous:
+                            _LOGGER.warning("Keeping last known state of %s: %s", sid, failed)
+                            all_server_results[sid] = {**previous, "summary": server}
+                        else:
+                            _LOGGER.warning("No state for %s yet, marking unavailable: %s", sid, failed)
+                            all_server_results[sid] = {
+                                "summary": server,
+                                "status": {},
+                                "flags": {},
+                                "stats": None,
+                                "query": {},
+                                "data": {},
+                                "missing": ["status", "flags"]
+                            }
+                        continue
+
+                    status = status_result.data or {}
+                    flags = flags_result.data or {}
+                    is_running = status.get("running", False)
                 
-                stats = None
-                query= {}
-                server_raw_data = {}
-
-                if is_running:
-                    try:
-                        stats = await client.get_server_stats(sid)
-                        query = await client.get_server_query(sid) or {}
-                        server_raw_data = await client.get_server_data(sid)
-                    except Exception as e:
-                        _LOGGER.warning("Could not fetch stats for %s: %s", sid, e)
-
-                all_server_results[sid] = {
-                    "summary": server,
-                    "status": status,
-                    "flags": flags,
-                    "stats": stats,
-                    "query": query,
-                    "data": server_raw_data
-                }
+                    stats = None
+                    query= {}
+                    server_raw_data = {}
+                    missing = []
+
+                    def last_known(key, result):
+                        # Keep the previous value of a failed call, or mark
+                        # the key missing so its entities become unavailable
+                        if result:
+                            return result.data
+                        value = previous.get(key)
+                        if value:
+                            _LOGGER.warning("Keeping last known %s of %s: %s", key, sid, result)
+                        else:
+                            _LOGGER.warning("Could not fetch %s for %s: %s", key, sid, result)
+                            missing.append(key)
+                        return value
+
+                    if is_running:
+                        stats = last_known("stats", await client.get_server_stats(sid))
+                        query = last_known("query", await client.get_server_query(sid)) or {}
+                        server_raw_data = last_known("data", await client.get_server_data(sid)) or {}
+
+                    if missing:
+                        server_span["outcome"] = "missing: " + ", ".join(missing)
+
+                    all_server_results[sid] = {
+                        "summary": server,
+                        "status": status,
+                        "flags": flags,
+                        "stats": stats,
+                        "query": query,
+                        "data": server_raw_data,
+                        "missing": missing
+                    }
 
             return all_server_results
             
@@ -97,6 +174,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         update_interval=timedelta(seconds=scan_interval),
     )
     coordinator.client = client
+    coordinator.tracer = tracer
 
     try:
         await coordinator.async_config_entry_first_refresh()
@@ -105,6 +183,13 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     entry.runtime_data = coordinator
 
+    # Drop devices (and their entities) for servers that were removed from
+    # the panel or are now excluded by the server filters
+    device_registry = dr.async_get(hass)
+    for device in dr.async_entries_for_config_entry(device_registry, entry.entry_id):
+        if not any(domain == DOMAIN and sid in coordinator.data for domain, sid in device.identifiers):
+            device_registry.async_update_device(device.id, remove_config_entry_id=entry.entry_id)
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     entry.async_on_unload(entry.add_update_listener(update_listener))
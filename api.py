@@ -1,11 +1,173 @@
 import asyncio
 import aiohttp
+import fnmatch
+import json
+import random
 import sys
+import time
 import logging
+from email.utils import parsedate_to_datetime
 _LOGGER = logging.getLogger(__name__)
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+# Fields kept from each endpoint's response, everything else is dropped on decode.
+# True keeps the whole value, a dict keeps only the listed keys and a
+# one-element list applies its spec to every item. Extend these when an
+# entity starts reading a new field.
+SERVER_SUMMARY_FIELDS = {
+    "id": True,
+    "name": True,
+    "type": True,
+    "ip": True,
+    "port": True,
+    "node": {"id": True, "name": True, "isLocal": True},
+}
+
+FIELD_PROJECTIONS = {
+    "servers": {"servers": [SERVER_SUMMARY_FIELDS]},
+    "status": {"running": True, "installing": True, "minecraft": True},
+    "flags": {"autoStart": True, "autoRestartOnCrash": True},
+    "stats": {"cpu": True, "memory": True},
+    "query": {"minecraft": {"numPlayers": True, "version": True}},
+    "data": {"data": {"modlauncher": {"value": True}, "motd": {"value": True}}},
+}
+
+
+def project(value, spec):
+    """Return only the parts of a decoded JSON value selected by spec."""
+    if spec is True or value is None:
+        return value
+    if isinstance(spec, list):
+        if not isinstance(value, list):
+            return []
+        return [project(item, spec[0]) for item in value]
+    if not isinstance(value, dict):
+        return {}
+    return {key: project(value[key], sub) for key, sub in spec.items() if key in value}
+
+
+class RetryPolicy:
+    """Bounded retry settings for PufferPanel API calls.
+
+    Timeouts are not retried by default: a hung node would otherwise cost
+    the whole budget on every call instead of a single request timeout."""
+
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=5.0, total_budget=20.0, request_timeout=10.0, retry_timeouts=False):
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.total_budget = total_budget
+        self.request_timeout = request_timeout
+        self.retry_timeouts = retry_timeouts
+
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff for the given (1-based) attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+class ServerFilter:
+    """Include/exclude rules deciding which servers are polled.
+
+    Rules are comma or newline separated. Each is either `field:pattern`
+    with field one of id, name, node or type, or a bare pattern matched
+    against the server ID and name. Patterns are case-insensitive globs.
+    An empty include list matches every server; exclude always wins."""
+
+    FIELDS = ("id", "name", "node", "type")
+
+    def __init__(self, include=None, exclude=None):
+        self.include = self._parse(include)
+        self.exclude = self._parse(exclude)
+
+    @classmethod
+    def _parse(cls, rules):
+        if not rules:
+            return []
+        if isinstance(rules, str):
+            rules = rules.replace("\n", ",").split(",")
+        parsed = []
+        for rule in rules:
+            rule = rule.strip()
+            if not rule:
+                continue
+            field, sep, pattern = rule.partition(":")
+            if sep and field.strip().lower() in cls.FIELDS:
+                parsed.append((field.strip().lower(), pattern.strip().lower()))
+            else:
+                parsed.append((None, rule.lower()))
+        return parsed
+
+    @staticmethod
+    def _values(summary, field):
+        if field == "node":
+            node = summary.get("node") or {}
+            if not isinstance(node, dict):
+                return [str(node)]
+            return [str(node.get("name", "")), str(node.get("id", ""))]
+        if field is None:
+            return [str(summary.get("id", "")), str(summary.get("name", ""))]
+        return [str(summary.get(field, ""))]
+
+    def _matches(self, summary, rules):
+        return any(
+            fnmatch.fnmatchcase(value.lower(), pattern)
+            for field, pattern in rules
+            for value in self._values(summary, field)
+        )
+
+    def allows(self, summary):
+        """Return True if a /servers summary entry should be monitored."""
+        if self.include and not self._matches(summary, self.include):
+            return False
+        return not self._matches(summary, self.exclude)
+
+
+class ApiResult:
+    """Outcome of a PufferPanel API call.
+
+    Truthy when the request succeeded. `error` is one of None, "auth",
+    "http", "timeout", "connection" or "decode"."""
+
+    def __init__(self, ok, data=None, status=None, error=None, message=None, attempts=1):
+        self.ok = ok
+        self.data = data
+        self.status = status
+        self.error = error
+        self.message = message
+        self.attempts = attempts
+
+    def __bool__(self):
+        return self.ok
+
+    def __repr__(self):
+        if self.ok:
+            return f"ApiResult(ok, status={self.status}, attempts={self.attempts})"
+        return f"ApiResult(error={self.error}, status={self.status}, message={self.message!r}, attempts={self.attempts})"
+
+
+def _retry_after_seconds(value):
+    """Parse a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
 class PufferPanelClient:
-    def __init__(self, host, port, client_id, client_secret, session, use_https=False):
+    def __init__(self, host, port, client_id, client_secret, session, use_https=False, retry_policy=None, projections=FIELD_PROJECTIONS, tracer=None):
         protocol = "https" if use_https else "http"
         port_int = int(float(port))
         self.base_url = f"{protocol}://{host}:{port_int}/api"
@@ -13,155 +175,337 @@ class PufferPanelClient:
         self.client_id = client_id
         self.client_secret = client_secret
         self.session = session
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.projections = projections or {}
+        self.tracer = tracer
+        self._inflight = {}
         self.token = None
 
 
 
     async def authenticate(self):
         """Exchange Client ID and Secret for a Bearer Token."""
+        if self.tracer is None:
+            return await self._authenticate()
+        with self.tracer.span("POST /oauth2/token", endpoint="/oauth2/token") as span:
+            ok = await self._authenticate()
+            span["outcome"] = "ok" if ok else "auth"
+            return ok
+
+    async def _authenticate(self):
         auth_data = {
             "grant_type": "client_credentials",
             "client_id": self.client_id,
             "client_secret": self.client_secret,
         }
         try:
-            async with self.session.post(self.auth_url, data=auth_data) as resp:
-                if resp.status == 200:
-                    res_json = await resp.json()
-                    self.token = res_json.get("access_token")
-                    _LOGGER.debug("PufferPanel authentication successful")
-                    return True
-                
-                _LOGGER.error("PufferPanel auth failed with status %s", resp.status)
-                return False
+            async with asyncio.timeout(self.retry_policy.request_timeout):
+                async with self.session.post(self.auth_url, data=auth_data) as resp:
+                    if resp.status == 200:
+                        res_json = await resp.json()
+                        self.token = res_json.get("access_token")
+                        _LOGGER.debug("PufferPanel authentication successful")
+                        return True
+                    
+                    _LOGGER.error("PufferPanel auth failed with status %s", resp.status)
+                    return False
         except Exception as e:
             _LOGGER.error("Exception during PufferPanel authentication: %s", e)
             return False
-    
-    async def _get(self, endpoint):
-        """Internal helper to handle authentication and URL building."""
+
+    async def _request(self, method, path, json_data=None, idempotent=True, projection=None):
+        """Send a request, recording a trace span when tracing is enabled."""
+        if self.tracer is None:
+            return await self._send(method, path, json_data, idempotent, projection)
+        parts = path.strip("/").split("/")
+        server_id = None
+        endpoint = path
+        if len(parts) >= 2 and parts[0] == "servers":
+            server_id = parts[1]
+            endpoint = "/".join(["/servers/{id}", *parts[2:]])
+        with self.tracer.span(f"{method} {endpoint}", endpoint=endpoint, server_id=server_id) as span:
+            result = await self._send(method, path, json_data, idempotent, projection)
+            span["outcome"] = "ok" if result else (result.error or "error")
+            span["status"] = result.status
+            span["attempts"] = result.attempts
+            return result
+
+    async def _send(self, method, path, json_data=None, idempotent=True, projection=None):
+        """Send a request and log it if it ultimately failed."""
+        result = await self._send_with_retries(method, path, json_data, idempotent, projection)
+        if not result:
+            _LOGGER.error("PufferPanel %s %s failed: %s", method, path, result)
+        return result
+
+    async def _send_with_retries(self, method, path, json_data=None, idempotent=True, projection=None):
+        """Send a request, retrying transient failures per the retry policy.
+
+        Non-idempotent requests are only retried when the panel says it did
+        not process them (429/503), never after a timeout or dropped connection."""
+        policy = self.retry_policy
+        deadline = time.monotonic() + policy.total_budget
+        url = f"{self.base_url}{path}"
+        reauthed = False
+        attempt = 0
+        result = None
+
         if not self.token:
             await self.authenticate()
-        url = f"{self.base_url}{endpoint}"
-        
-        headers = {
-            "Authorization": f"Bearer {self.token}", 
-            "Accept": "application/json"
-        }
-        
+
+        while True:
+            attempt += 1
+            retry_after = None
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            headers = {
+                "Authorization": f"Bearer {self.token}",
+                "Accept": "application/json"
+            }
+
+            attempt_timeout = min(policy.request_timeout, remaining)
+            try:
+                async with asyncio.timeout(attempt_timeout):
+                    async with self.session.request(method, url, json=json_data, headers=headers) as resp:
+                        if resp.status == 401 and not reauthed:
+                            reauthed = True
+                            attempt -= 1
+                            if await self.authenticate():
+                                continue
+                            return ApiResult(False, status=401, error="auth", message="Re-authentication failed", attempts=attempt + 1)
+                        if resp.status == 204:
+                            return ApiResult(True, {}, status=204, attempts=attempt)
+                        if 200 <= resp.status < 300:
+                            data = {}
+                            if method == "GET":
+                                body = await resp.read()
+                                try:
+                                    data = _json_loads(body) if body else {}
+                                except ValueError as e:
+                                    return ApiResult(False, status=resp.status, error="decode", message=str(e), attempts=attempt)
+                                if projection is not None:
+                                    data = project(data, projection)
+                            return ApiResult(True, data if data is not None else {}, status=resp.status, attempts=attempt)
+
+                        error = "auth" if resp.status in (401, 403) else "http"
+                        result = ApiResult(False, status=resp.status, error=error, message=resp.reason, attempts=attempt)
+                        if resp.status not in RETRYABLE_STATUSES:
+                            return result
+                        if not idempotent and resp.status not in (429, 503):
+                            return result
+                        retry_after = _retry_after_seconds(resp.headers.get("Retry-After"))
+            except TimeoutError:
+                result = ApiResult(False, error="timeout", message=f"Timed out after {attempt_timeout:.1f}s", attempts=attempt)
+            except aiohttp.ClientError as e:
+                result = ApiResult(False, error="connection", message=str(e), attempts=attempt)
+
+            if attempt >= policy.max_attempts:
+                break
+            if not idempotent and result.error != "http":
+                break
+            if result.error == "timeout" and not policy.retry_timeouts:
+                break
+
+            delay = retry_after if retry_after is not None else policy.backoff(attempt)
+            if time.monotonic() + delay >= deadline:
+                break
+            _LOGGER.debug("PufferPanel %s %s failed (%s), retrying in %.2fs", method, path, result, delay)
+            await asyncio.sleep(delay)
+
+        if result is None:
+            result = ApiResult(False, error="timeout", message="Retry budget exhausted", attempts=attempt - 1)
+        return result
+
+    async def _get(self, endpoint, kind=None):
+        """Internal helper for GET requests, projecting the response by kind.
+
+        Concurrent calls for the same endpoint share one in-flight request:
+        the first caller sends it, later callers wait on its result."""
+        pending = self._inflight.get(endpoint)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[endpoint] = future
         try:
-            async with asyncio.timeout(10):
-                async with self.session.get(url, headers=headers) as resp:
-                    if resp.status == 401:
-                        await self.authenticate()
-                        return await self._get(endpoint)
-                    if resp.status == 204:
-                        return {}
-                    if resp.status == 200:
-                        return await resp.json()
-                    return None
-        except Exception as e:
-            _LOGGER.error("PufferPanel connection error: %s", e)
-            return None
-            
+            result = await self._request("GET", endpoint, projection=self.projections.get(kind))
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as err:
+            future.set_exception(err)
+            # Mark as retrieved so an unshared failure isn't logged by asyncio
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(endpoint, None)
 
     async def get_servers(self):
-        response = await self._get("/servers")
-        if response is None:
-            _LOGGER.error("PufferPanel API returned None for /servers")
-            return {"servers": []}
-            
-        return response
+        return await self._get("/servers", "servers")
 
     async def get_server_status(self, server_id):
-        return await self._get(f"/servers/{server_id}/status")
+        return await self._get(f"/servers/{server_id}/status", "status")
 
     async def get_server_stats(self, server_id):
-        return await self._get(f"/servers/{server_id}/stats")
+        return await self._get(f"/servers/{server_id}/stats", "stats")
 
     async def get_server_query(self, server_id):
-        return await self._get(f"/servers/{server_id}/query")
+        return await self._get(f"/servers/{server_id}/query", "query")
 
     async def get_server_flags(self, server_id):
-        return await self._get(f"/servers/{server_id}/flags")
+        return await self._get(f"/servers/{server_id}/flags", "flags")
 
     async def get_server_data(self, server_id):
-        return await self._get(f"/servers/{server_id}/data")
+        return await self._get(f"/servers/{server_id}/data", "data")
 
     async def _post(self, path, json_data=None):
         """Internal helper for POST requests."""
-        if not self.token:
-            await self.authenticate()
-            
-        url = f"{self.base_url}{path}"
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Accept": "application/json"
-        }
-        
-        try:
-            async with self.session.post(url, json=json_data, headers=headers, timeout=10) as response:
-                if response.status in [200, 202, 204]:
-                    return True
-                
-                _LOGGER.error("PufferPanel POST %s failed: %s", path, response.status)
-                return False
-        except Exception as e:
-            _LOGGER.error("PufferPanel connection error during POST: %s", e)
-            return {}
+        return await self._request("POST", path, json_data=json_data, idempotent=False)
 
     async def send_server_action(self, server_id, action):
         return await self._post(f"/servers/{server_id}/{action}", json_data={})
 
-# --- INTERACTIVE TEST BLOCK ---
-if __name__ == "__main__":
-    print("\n--- PufferPanel API Interactive Tester ---")
-    
-    host_in = input("Host (e.g 192.168.x.x): ").strip()
-    port_in = input("Port (default 8080): ").strip() or "8080"
-    c_id = input("Client ID: ").strip()
-    c_sec = input("Client Secret: ").strip()
-    use_https = (input("Use HTTPS? (y/N): ").lower().strip() or "n") == 'y'
-
-    async def run_test():
+# --- LOAD TEST CLI ---
+ENDPOINTS = ("status", "flags", "stats", "query", "data")
+RUNNING_ENDPOINTS = ("stats", "query", "data")
+
+
+def _percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return round(sorted_values[int(rank) - 1], 2)
+
+
+def _summarise(samples, wall_time):
+    """Build the JSON report section for one endpoint's samples."""
+    latencies = sorted(ms for ms, _ in samples)
+    errors = {}
+    for _, result in samples:
+        if not result:
+            key = result.error if result.status is None else f"{result.error}_{result.status}"
+            errors[key] = errors.get(key, 0) + 1
+    return {
+        "requests": len(samples),
+        "errors": sum(errors.values()),
+        "error_types": errors,
+        "retries": sum(result.attempts - 1 for _, result in samples),
+        "throughput_rps": round(len(samples) / wall_time, 2) if wall_time else None,
+        "latency_ms": {
+            "min": round(latencies[0], 2) if latencies else None,
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else None,
+            "p50": _percentile(latencies, 50),
+            "p90": _percentile(latencies, 90),
+            "p99": _percentile(latencies, 99),
+            "max": round(latencies[-1], 2) if latencies else None,
+        },
+    }
+
+
+async def run_load_test(client, endpoints=ENDPOINTS, concurrency=8, repeat=1, server_filter=None):
+    """Poll /servers and the per-server endpoints, returning a latency report.
+
+    Status is always fetched since it decides whether the running-only
+    endpoints are polled."""
+    samples = {"servers": []}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed(name, call, *args):
+        async with semaphore:
+            started = time.perf_counter()
+            result = await call(*args)
+            samples.setdefault(name, []).append(((time.perf_counter() - started) * 1000, result))
+            return result
+
+    async def poll_server(sid):
+        # Like async_update_data: status and flags always, the rest only
+        # for servers that are running
+        status = await timed("status", client.get_server_status, sid)
+        is_running = bool(status) and bool((status.data or {}).get("running"))
+        names = [n for n in endpoints if n == "flags" or (is_running and n in RUNNING_ENDPOINTS)]
+        await asyncio.gather(*(timed(n, getattr(client, f"get_server_{n}"), sid) for n in names))
+        return is_running
+
+    if not await client.authenticate():
+        return {"error": "authentication failed"}
+
+    started = time.perf_counter()
+    server_ids = []
+    running = []
+    for _ in range(repeat):
+        res = await timed("servers", client.get_servers)
+        if res:
+            server_ids = [
+                s["id"] for s in res.data.get("servers", [])
+                if server_filter is None or server_filter.allows(s)
+            ]
+        running = await asyncio.gather(*(poll_server(sid) for sid in server_ids))
+    wall_time = time.perf_counter() - started
+
+    all_samples = [s for values in samples.values() for s in values]
+    return {
+        "servers": len(server_ids),
+        "running": sum(running),
+        "repeat": repeat,
+        "concurrency": concurrency,
+        "wall_time_s": round(wall_time, 3),
+        "total": _summarise(all_samples, wall_time),
+        "endpoints": {name: _summarise(values, wall_time) for name, values in samples.items()},
+    }
+
+
+def main(argv=None):
+    """Benchmark a PufferPanel instance from the command line and print JSON."""
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description="Load test the PufferPanel API used by this integration.")
+    parser.add_argument("--host", default=os.environ.get("PUFFERPANEL_HOST"))
+    parser.add_argument("--port", default=os.environ.get("PUFFERPANEL_PORT", "8080"))
+    parser.add_argument("--client-id", default=os.environ.get("PUFFERPANEL_CLIENT_ID"))
+    parser.add_argument("--client-secret", default=os.environ.get("PUFFERPANEL_CLIENT_SECRET"))
+    parser.add_argument("--https", action="store_true", default=os.environ.get("PUFFERPANEL_HTTPS", "").lower() in ("1", "true", "yes"))
+    parser.add_argument("--concurrency", type=int, default=8, help="maximum requests in flight")
+    parser.add_argument("--repeat", type=int, default=1, help="number of full polling cycles")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="comma separated per-server endpoints")
+    parser.add_argument("--include", default=os.environ.get("PUFFERPANEL_INCLUDE"), help="server include rules, e.g. name:survival*,node:remote")
+    parser.add_argument("--exclude", default=os.environ.get("PUFFERPANEL_EXCLUDE"), help="server exclude rules")
+    parser.add_argument("--no-retry", action="store_true", help="single attempt per request")
+    parser.add_argument("--no-projection", action="store_true", help="keep full response bodies")
+    args = parser.parse_args(argv)
+
+    missing = [name for name in ("host", "client_id", "client_secret") if not getattr(args, name)]
+    if missing:
+        parser.error("missing " + ", ".join(missing) + " (pass as arguments or PUFFERPANEL_* environment variables)")
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = [e for e in endpoints if e not in ENDPOINTS]
+    if unknown:
+        parser.error("unknown endpoints: " + ", ".join(unknown))
+
+    async def run():
         async with aiohttp.ClientSession() as session:
-            client = PufferPanelClient(host_in, port_in, c_id, c_sec, session, use_https)
-        
-            print("\nAttempting to authenticate...")
-            if await client.authenticate():
-                print("Authentication Successful \n")
-
-                print("Fetching servers...")
-                res = await client.get_servers()
-                servers = res.get("servers", []) if res else []
-                print(f"Found {len(servers)} servers\n")
-                
-                print(f"{'NAME':<20} | {'TYPE':<15} | {'ID':<10} | {'CPU':<6} | {'RAM'}")
-                print("-" * 50)
-                
-                for s in servers:
-                    sid = s['id']
-                    status = await client.get_server_status(sid)
-                    
-                    if not status or not status.get("running"):
-                        print(f"{s['name']:<20} | {'Offline':<10}")
-                    else:
-                        stats = await client.get_server_stats(sid)
-                        
-                        if stats is None:
-                            print(f"{s['name']:<20} | Offline")
-                        else:
-                            cpu = round(stats.get('cpu', 0), 2)
-                            cpu_str = f"{cpu}%"
-                            mem_raw = round(stats.get('memory', 0), 2)
-                            mem_converted = round(mem_raw / (1024 ** 3), 2)
-                            mem_str = f"{mem_converted}GB"
-                            print(f"{s['name']:<20} | {s['type']:<15} | {s['id']:<10} | {cpu_str:<6} | {mem_str}")
-            else:
-                print("Authentication failed. Check credentials.")
+            client = PufferPanelClient(
+                args.host, args.port, args.client_id, args.client_secret, session, args.https,
+                retry_policy=RetryPolicy(max_attempts=1) if args.no_retry else None,
+                projections=None if args.no_projection else FIELD_PROJECTIONS,
+            )
+            return await run_load_test(
+                client, endpoints, max(1, args.concurrency), max(1, args.repeat),
+                ServerFilter(args.include, args.exclude),
+            )
 
     try:
-        asyncio.run(run_test())
+        report = asyncio.run(run())
     except KeyboardInterrupt:
-        print("\nTest cancelled.")
-        sys.exit(0)
+        return 130
+    print(json.dumps(report, indent=2))
+    return 1 if "error" in report else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
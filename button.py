@@ -61,7 +61,8 @@ class PufferPanelButton(ButtonEntity):
     @property
     def available(self) -> bool:
         """Return True if the server is available."""
-        return self.coordinator.last_update_success
+        missing = self.coordinator.data.get(self.server_id, {}).get("missing", ())
+        return self.coordinator.last_update_success and "status" not in missing
 
     async def async_press(self) -> None:
         """Handle the button press."""
@@ -28,6 +28,12 @@ class PufferPanelConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 vol.Required("core_count", default=1): selector.NumberSelector(
                     selector.NumberSelectorConfig(min=1, max=512, mode=selector.NumberSelectorMode.BOX)
                 ),
+                vol.Optional("include_servers", default=""): selector.TextSelector(
+                    selector.TextSelectorConfig(multiline=True)
+                ),
+                vol.Optional("exclude_servers", default=""): selector.TextSelector(
+                    selector.TextSelectorConfig(multiline=True)
+                ),
             }),
             errors=errors,
         )
@@ -75,6 +81,8 @@ class PufferPanelOptionsFlow(config_entries.OptionsFlow):
     async def async_step_init(self, user_input=None):
         """Manage the options."""
         if user_input is not None:
+            user_input.setdefault("include_servers", "")
+            user_input.setdefault("exclude_servers", "")
             return self.async_create_entry(title="", data=user_input)
 
         data_schema = vol.Schema({
@@ -84,6 +92,13 @@ class PufferPanelOptionsFlow(config_entries.OptionsFlow):
             vol.Required("core_count"): selector.NumberSelector(
                 selector.NumberSelectorConfig(min=1, max=512, mode=selector.NumberSelectorMode.BOX)
             ),
+            vol.Optional("include_servers"): selector.TextSelector(
+                selector.TextSelectorConfig(multiline=True)
+            ),
+            vol.Optional("exclude_servers"): selector.TextSelector(
+                selector.TextSelectorConfig(multiline=True)
+            ),
+            vol.Optional("enable_tracing", default=False): selector.BooleanSelector(),
         })
 
         return self.async_show_form(
@@ -1 +1,4 @@
 DOMAIN = "pufferpanel"
+
+# Refresh cycles kept in memory when tracing is enabled
+TRACE_CYCLES = 10
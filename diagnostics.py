@@ -0,0 +1,22 @@
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+TO_REDACT = {"client_id", "client_secret", "host"}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return diagnostics, including the refresh trace when tracing is enabled."""
+    coordinator = entry.runtime_data
+    tracer = getattr(coordinator, "tracer", None)
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "servers": len(coordinator.data or {}),
+        "last_update_success": coordinator.last_update_success,
+        # Save this key on its own to open it in chrome://tracing or Perfetto
+        "chrome_trace": tracer.export_chrome_trace() if tracer else None,
+    }
@@ -50,7 +50,10 @@ async def async_setup_entry(hass, entry, async_add_entities):
 
 class PufferPanelBaseEntity(CoordinatorEntity):
     """Common base for all PufferPanel entities to handle device grouping."""
-    
+
+    # Key of the coordinator entry this entity reads, used for availability
+    _data_key = None
+
     def __init__(self, coordinator, server_id, server_name, server_type):
         super().__init__(coordinator)
         self.server_id = server_id
@@ -81,8 +84,16 @@ class PufferPanelBaseEntity(CoordinatorEntity):
             configuration_url=base_url
         )
 
+    @property
+    def available(self):
+        """Unavailable while the data this entity reads could not be fetched."""
+        missing = self.coordinator.data.get(self.server_id, {}).get("missing", ())
+        return super().available and "status" not in missing and self._data_key not in missing
+
 class PufferPanelServerStatusSensor(PufferPanelBaseEntity, SensorEntity):
     """Server status sensor."""
+    _data_key = "status"
+
     def __init__(self, coordinator, server_id, server_name, server_type):
         super().__init__(coordinator, server_id, server_name, server_type)
         self._attr_unique_id = f"{server_id}_status"
@@ -111,6 +122,8 @@ class PufferPanelServerStatusSensor(PufferPanelBaseEntity, SensorEntity):
 
 class PufferPanelThreadSensor(PufferPanelBaseEntity, SensorEntity):
     """Thread usage sensor."""
+    _data_key = "stats"
+
     def __init__(self, coordinator, server_id, server_name, server_type):
         super().__init__(coordinator, server_id, server_name, server_type)
         self._attr_unique_id = f"{server_id}_thread"
@@ -126,6 +139,8 @@ class PufferPanelThreadSensor(PufferPanelBaseEntity, SensorEntity):
 
 class PufferPanelCPUSensor(PufferPanelBaseEntity, SensorEntity):
     """CPU usage sensor."""
+    _data_key = "stats"
+
     def __init__(self, coordinator, server_id, server_name, server_type):
         super().__init__(coordinator, server_id, server_name, server_type)
         self._attr_unique_id = f"{server_id}_cpu"
@@ -153,6 +168,8 @@ class PufferPanelCPUSensor(PufferPanelBaseEntity, SensorEntity):
 
 class PufferPanelRAMSensor(PufferPanelBaseEntity, SensorEntity):
     """RAM usage sensor in GB."""
+    _data_key = "stats"
+
     def __init__(self, coordinator, server_id, server_name, server_type):
         super().__init__(coordinator, server_id, server_name, server_type)
         self._attr_unique_id = f"{server_id}_ram"
@@ -202,6 +219,8 @@ class PufferPanelPortSensor(PufferPanelBaseEntity, SensorEntity):
 
 class PufferPanelAutoStartSensor(PufferPanelBaseEntity, SensorEntity):
     """Auto start sensor."""
+    _data_key = "flags"
+
     def __init__(self, coordinator, server_id, server_name, server_type):
         super().__init__(coordinator, server_id, server_name, server_type)
         self._attr_unique_id = f"{server_id}_autostart"
@@ -215,6 +234,8 @@ class PufferPanelAutoStartSensor(PufferPanelBaseEntity, SensorEntity):
 
 class PufferPanelAutoStartCrashSensor(PufferPanelBaseEntity, SensorEntity):
     """Auto start sensor."""
+    _data_key = "flags"
+
     def __init__(self, coordinator, server_id, server_name, server_type):
         super().__init__(coordinator, server_id, server_name, server_type)
         self._attr_unique_id = f"{server_id}_autostart_crash"
@@ -245,6 +266,8 @@ class PufferPanelNodeSensor(PufferPanelBaseEntity, SensorEntity):
 
 class MinecraftPlayerSensor(PufferPanelBaseEntity, SensorEntity):
     """Minecraft player count sensor."""
+    _data_key = "query"
+
     def __init__(self, coordinator, server_id, server_name, server_type):
         super().__init__(coordinator, server_id, server_name, server_type)
         self._attr_unique_id = f"{server_id}_players"
@@ -272,6 +295,8 @@ class MinecraftPlayerSensor(PufferPanelBaseEntity, SensorEntity):
 
 class MinecraftVersionSensor(PufferPanelBaseEntity, SensorEntity):
     """Minecraft version sensor."""
+    _data_key = "query"
+
     def __init__(self, coordinator, server_id, server_name, server_type):
         super().__init__(coordinator, server_id, server_name, server_type)
         self._attr_unique_id = f"{server_id}_version"
@@ -289,6 +314,8 @@ class MinecraftVersionSensor(PufferPanelBaseEntity, SensorEntity):
 
 class MinecraftModLauncher(PufferPanelBaseEntity, SensorEntity):
     """Minecraft mod launcher sensor."""
+    _data_key = "data"
+
     def __init__(self, coordinator, server_id, server_name, server_type):
         super().__init__(coordinator, server_id, server_name, server_type)
         self._attr_unique_id = f"{server_id}_modlauncher"
@@ -323,6 +350,8 @@ class MinecraftModLauncher(PufferPanelBaseEntity, SensorEntity):
 
 class MinecraftMOTD(PufferPanelBaseEntity, SensorEntity):
     """Minecraft MOTD sensor."""
+    _data_key = "data"
+
     def __init__(self, coordinator, server_id, server_name, server_type):
         super().__init__(coordinator, server_id, server_name, server_type)
         self._attr_unique_id = f"{server_id}_motd"
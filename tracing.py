@@ -0,0 +1,90 @@
+import contextvars
+import itertools
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# (tracer, spans) of the refresh cycle the current task is running in.
+# Kept per context so overlapping refreshes each record into their own cycle.
+_ACTIVE_CYCLE = contextvars.ContextVar("pufferpanel_active_cycle", default=None)
+
+# (tracer, lane) of the outermost open span. Nested spans share its trace
+# row so Chrome trace viewers nest them; each new top-level span gets a
+# fresh lane.
+_ACTIVE_LANE = contextvars.ContextVar("pufferpanel_active_lane", default=None)
+
+
+class RefreshTracer:
+    """Bounded in-memory recorder of refresh cycles and API request spans.
+
+    Spans are grouped per refresh cycle and only the last `max_cycles`
+    cycles are kept. Spans recorded outside a cycle (button presses,
+    token refreshes) go to a separate bounded buffer."""
+
+    def __init__(self, max_cycles=10, max_loose_spans=200):
+        self.cycles = deque(maxlen=max_cycles)
+        self.loose_spans = deque(maxlen=max_loose_spans)
+        self.server_nodes = {}
+        self._lanes = itertools.count(1)
+        self._epoch_us = (time.time() - time.perf_counter()) * 1_000_000
+
+    def _now_us(self):
+        return self._epoch_us + time.perf_counter() * 1_000_000
+
+    @contextmanager
+    def cycle(self):
+        """Record everything inside the block as one refresh cycle."""
+        spans = []
+        token = _ACTIVE_CYCLE.set((self, spans))
+        try:
+            with self.span("refresh", cat="cycle") as root:
+                yield root
+        finally:
+            _ACTIVE_CYCLE.reset(token)
+            self.cycles.append(spans)
+
+    @contextmanager
+    def span(self, name, cat="request", **args):
+        """Time the block. Callers may set `outcome` or other args on the yielded dict."""
+        server_id = args.get("server_id")
+        if server_id is not None and "node" not in args and server_id in self.server_nodes:
+            args["node"] = self.server_nodes[server_id]
+        lane_token = None
+        lane = _ACTIVE_LANE.get()
+        if lane is None or lane[0] is not self:
+            lane = (self, next(self._lanes))
+            lane_token = _ACTIVE_LANE.set(lane)
+        span = {"name": name, "cat": cat, "tid": lane[1], "ts": self._now_us(), "args": args}
+        active = _ACTIVE_CYCLE.get()
+        target = active[1] if active is not None and active[0] is self else self.loose_spans
+        try:
+            yield args
+        except BaseException as err:
+            args.setdefault("outcome", f"exception: {type(err).__name__}")
+            raise
+        finally:
+            args.setdefault("outcome", "ok")
+            span["dur"] = self._now_us() - span["ts"]
+            target.append(span)
+            if lane_token is not None:
+                _ACTIVE_LANE.reset(lane_token)
+
+    def export_chrome_trace(self):
+        """Return the buffered spans as Chrome trace event JSON."""
+        events = [
+            {"name": "process_name", "ph": "M", "pid": 1, "tid": 0, "args": {"name": "PufferPanel"}},
+        ]
+        for spans in [*self.cycles, self.loose_spans]:
+            for span in spans:
+                events.append({
+                    "name": span["name"],
+                    "cat": span["cat"],
+                    "ph": "X",
+                    "pid": 1,
+                    "tid": span["tid"],
+                    "ts": round(span["ts"], 1),
+                    "dur": round(span.get("dur", 0), 1),
+                    "args": span["args"],
+                })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+